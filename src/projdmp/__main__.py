@@ -13,7 +13,13 @@ import argparse
 import fnmatch
 from pathlib import Path
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import mmap
+import re
+import stat
+from collections.abc import Callable, Iterator
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 import pathspec
 from rich.console import Console
 from rich.progress import (
@@ -44,7 +50,62 @@ console = Console()
 
 # Directories that are never descended into, under any configuration.
 # (Use --files to pull individual files out of these if you really must.)
-ALWAYS_EXCLUDED_DIRS = {".git", ".hg", ".svn"}
+ALWAYS_EXCLUDED_DIRS = frozenset({".git", ".hg", ".svn"})
+
+# Per-directory verdict bits, computed once by the walker for each directory
+# and inherited by everything below it.
+DIR_HIDDEN = 1  # the directory or one of its parents is hidden
+DIR_IGNORED = 2  # the directory or one of its parents is gitignored
+
+# Write buffer for the output file. Large enough that most per-file blobs
+# are coalesced into a handful of write() syscalls.
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Default number of files read in parallel. Reads are blocking syscalls that
+# release the GIL, so this can comfortably exceed the core count.
+DEFAULT_IO_CONCURRENCY = min(32, (os.cpu_count() or 1) * 8)
+
+# Upper bound on how many files one worker task reads in a row.
+MAX_CHUNK_SIZE = 64
+
+# Files at least this large (256 KiB) are memory-mapped; smaller ones are
+# read with a single os.read(fd, size + 1).
+MMAP_THRESHOLD = 256 * 1024
+
+# Like git, a file with a NUL byte in its first BINARY_SNIFF_SIZE bytes is
+# treated as binary without decoding the rest. So is one that starts with a
+# well-known binary signature.
+BINARY_SNIFF_SIZE = 8000
+BINARY_SIGNATURES = (
+    b"\x89PNG",  # PNG
+    b"\xff\xd8\xff",  # JPEG
+    b"GIF8",  # GIF
+    b"%PDF-",  # PDF
+    b"PK\x03\x04",  # zip (and jar, docx, whl, ...)
+    b"\x1f\x8b",  # gzip
+    b"\x7fELF",  # ELF executable
+    b"\x80\x04",  # pickle (protocol 4)
+    b"\x89HDF",  # HDF5
+)
+
+# The ASCII characters str.strip() removes. bytes.strip() on its own leaves
+# \x1c-\x1f in place, so pure-ASCII files are stripped with this instead.
+ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# Flags for opening input files. O_NOATIME (Linux) skips the access-time
+# update on each read; it is only allowed on files we own, so _open_input
+# retries without it when the kernel refuses.
+READ_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+NOATIME_FLAG = getattr(os, "O_NOATIME", 0)
+
+# Most blobs handed to a single os.writev() call: the platform's IOV_MAX,
+# or the common Linux value where it can't be queried.
+try:
+    WRITEV_BATCH = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    WRITEV_BATCH = -1
+if WRITEV_BATCH <= 0:
+    WRITEV_BATCH = 1024
 
 # Known filenames → code-fence language hints
 FILENAME_LANG: dict[str, str] = {
@@ -86,16 +147,28 @@ FILENAME_LANG: dict[str, str] = {
 EXT_LANG: dict[str, str] = {
     "py": "python",
     "pyi": "python",
+    "pyw": "python",
+    "pyx": "cython",
     "js": "javascript",
     "mjs": "javascript",
     "cjs": "javascript",
     "ts": "typescript",
+    "mts": "typescript",
+    "cts": "typescript",
     "rs": "rust",
     "rb": "ruby",
     "yml": "yaml",
     "md": "markdown",
     "mdx": "markdown",
+    "markdown": "markdown",
+    "htm": "html",
     "sh": "bash",
+    "ps1": "powershell",
+    "psm1": "powershell",
+    "bat": "batch",
+    "cmd": "batch",
+    "cs": "csharp",
+    "jl": "julia",
     "h": "c",
     "hpp": "cpp",
     "hxx": "cpp",
@@ -117,6 +190,9 @@ EXT_LANG: dict[str, str] = {
     "fsx": "fsharp",
     "tf": "hcl",
     "gradle": "groovy",
+    "mk": "make",
+    "ipynb": "json",
+    "jsonc": "json",
     "cfg": "ini",
     "conf": "ini",
     "txt": "text",
@@ -139,26 +215,57 @@ def _format_size(n_bytes: float) -> str:
     return f"{n_bytes:.1f} TB"
 
 
-def _relative_path(filepath: Path, base: Path) -> Path:
-    """Compute relative path, handling paths not under base via os.path.relpath."""
-    try:
-        return filepath.resolve().relative_to(base.resolve())
-    except ValueError:
-        return Path(os.path.relpath(filepath.resolve(), base.resolve()))
+def _relative_path(path_str: str, base_str: str) -> str:
+    """Compute relative path, handling paths not under base via os.path.relpath.
+
+    Both paths must already be resolved strings; the common case (path
+    under base) is a plain string-prefix slice, with no filesystem access
+    and no Path objects.
+    """
+    base_prefix = base_str.rstrip(os.sep) + os.sep
+    if path_str.startswith(base_prefix):
+        return path_str[len(base_prefix):]
+    return os.path.relpath(path_str, base_str)
+
 
+def _path_sort_key(path: str) -> list[str]:
+    """Sort key matching the order of the equivalent Path objects (by component)."""
+    return os.path.normcase(path).split(os.sep)
+
+
+def _display_prefix(base: Path) -> str:
+    """Display-path prefix naming a base folder (when several are scanned)."""
+    return base.name + os.sep if base.name else ""
+
+
+def _file_extension(name: str) -> str:
+    """Lower-cased extension of a file name, without the dot ('' if none).
+
+    Same rules as PurePath.suffix (so '.bashrc' and 'notes.' have no
+    extension), but works on the bare name without building a Path.
+    """
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[i + 1:].lower()
+    return ""
 
-def _detect_language(filepath: Path, content: str) -> str:
-    """Determine code-fence language for a file."""
-    if filepath.name in FILENAME_LANG:
-        return FILENAME_LANG[filepath.name]
 
-    ext = filepath.suffix[1:].lower() if filepath.suffix else ""
+def _detect_language(name: str, content: str | bytes) -> str:
+    """Determine code-fence language for a file, given its name and content.
+
+    content is either the decoded text or the raw bytes of a pure-ASCII file.
+    """
+    if name in FILENAME_LANG:
+        return FILENAME_LANG[name]
+
+    ext = _file_extension(name)
     if ext:
         return EXT_LANG.get(ext, ext)
 
-    first_line = content.split("\n", 1)[0] if content else ""
-    if first_line.startswith("#!"):
-        shebang = first_line.lower()
+    if content[:2] in ("#!", b"#!"):
+        if isinstance(content, bytes):
+            content = content.partition(b"\n")[0].decode("ascii")
+        shebang = content.partition("\n")[0].lower()
         if "python" in shebang:
             return "python"
         if "bash" in shebang or "/sh" in shebang:
@@ -190,7 +297,121 @@ def _compile_spec(
         return None  # unreachable; keeps type-checkers happy
 
 
-def _dir_could_contain_match(rel_dir_posix: str, include_patterns: list[str]) -> bool:
+def _dedupe_patterns(patterns: list[str]) -> list[str]:
+    """Drop repeated patterns, keeping the LAST occurrence of each.
+
+    With gitignore semantics the last matching pattern decides, so only a
+    pattern's final position can matter; earlier copies are dead weight.
+    """
+    return list(reversed(dict.fromkeys(reversed(patterns))))
+
+
+def _split_name_patterns(patterns: list[str]) -> tuple[frozenset[str], list[str]]:
+    """Separate plain directory names from real patterns.
+
+    A gitignore-style pattern that is just a name (e.g. 'node_modules' or
+    'build/') matches any directory with exactly that name, so it can be
+    checked with a set lookup on the entry name instead of going through
+    pathspec. Returns (names, remaining_patterns). If any pattern is a
+    negation, ordering matters and everything stays a pattern.
+    """
+    if any(p.strip().startswith("!") for p in patterns):
+        return frozenset(), patterns
+    names: set[str] = set()
+    rest: list[str] = []
+    for pat in patterns:
+        name = pat[:-1] if pat.endswith("/") else pat
+        if (
+            name
+            and name == name.strip()
+            and not name.startswith("#")
+            and not any(c in name for c in "*?[]\\/")
+        ):
+            names.add(name)
+        else:
+            rest.append(pat)
+    return frozenset(names), rest
+
+
+def _matches_name(
+    rel_posix: str, names: frozenset[str], parent_names: frozenset[str]
+) -> bool:
+    """Does a plain-name pattern match this file path?
+
+    As in gitignore, a name matches the file itself or any directory above
+    it. parent_names holds the names that may match a directory, which
+    includes names given with a trailing '/' (those match directories only).
+    """
+    parent, _, name = rel_posix.rpartition("/")
+    if name in names:
+        return True
+    return bool(parent) and not parent_names.isdisjoint(parent.split("/"))
+
+
+def _compile_name_globs(
+    patterns: list[str],
+) -> tuple[re.Pattern[str] | None, list[str]]:
+    """Compile slash-free '*'/'?' globs (e.g. 'node_*') into one name regex.
+
+    Used for directory pruning: a pattern without '/' matches any directory
+    whose own name fits it, and a parent that fit it would already have been
+    pruned, so testing each directory's name is enough. Returns (regex,
+    remaining_patterns). As with _split_name_patterns, negations make
+    ordering matter, so then nothing is compiled.
+    """
+    if any(p.strip().startswith("!") for p in patterns):
+        return None, patterns
+    globs: list[str] = []
+    rest: list[str] = []
+    for pat in patterns:
+        name = pat[:-1] if pat.endswith("/") else pat
+        if (
+            name
+            and name == name.strip()
+            and not name.startswith("#")
+            and not any(c in name for c in "[]\\/")
+            and "**" not in name
+        ):
+            globs.append(fnmatch.translate(name))
+        else:
+            rest.append(pat)
+    if not globs:
+        return None, rest
+    return re.compile("|".join(globs)), rest
+
+
+def _unlocks_dirs(pattern: str) -> bool:
+    """True if an --include pattern is path-qualified (can unlock pruned dirs)."""
+    pat = pattern.strip()
+    if not pat or pat.startswith("!"):
+        return False
+    return "/" in pat.lstrip("/").rstrip("/")
+
+
+def _compile_dir_unlockers(
+    include_patterns: list[str],
+) -> list[tuple[re.Pattern[str] | None, ...]]:
+    """Precompile the path-qualified --include patterns, one regex per segment.
+
+    A '**' segment is stored as None ("anything below could match"). Case
+    sensitivity follows fnmatch.fnmatch for the platform.
+    """
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    unlockers = []
+    for raw in include_patterns:
+        if not _unlocks_dirs(raw):
+            continue  # bare-name pattern: doesn't unlock pruned dirs
+        parts = raw.strip().lstrip("/").rstrip("/").split("/")
+        unlockers.append(tuple(
+            None if part == "**" else re.compile(fnmatch.translate(part), flags)
+            for part in parts
+        ))
+    return unlockers
+
+
+def _dir_could_contain_match(
+    rel_dir_posix: str, unlockers: list[tuple[re.Pattern[str] | None, ...]]
+) -> bool:
     """Heuristic: could a *path-qualified* include pattern match under this dir?
 
     Only patterns containing '/' are considered — bare-name patterns
@@ -198,31 +419,21 @@ def _dir_could_contain_match(rel_dir_posix: str, include_patterns: list[str]) ->
     directories, otherwise a broad include would drag in venvs, build
     output, etc.  Path-qualified patterns (e.g. '.github/**',
     'dist/bundle.js') unlock exactly the directories they name.
+    unlockers holds those patterns as compiled by _compile_dir_unlockers.
 
     This errs on the permissive side: returning True merely means "descend
     and let the file-level check decide".
     """
     dir_parts = rel_dir_posix.split("/")
-    for raw in include_patterns:
-        pat = raw.strip()
-        if not pat or pat.startswith("!"):
-            continue
-        core = pat.lstrip("/").rstrip("/")
-        if "/" not in core:
-            continue  # bare-name pattern: doesn't unlock pruned dirs
-        pat_parts = core.split("/")
-        compatible = True
-        for i, dpart in enumerate(dir_parts):
-            if i >= len(pat_parts):
-                # Pattern matched a parent of this dir → whole subtree eligible
-                break
-            ppart = pat_parts[i]
-            if ppart == "**":
-                break  # anything below could match
-            if not fnmatch.fnmatch(dpart, ppart):
-                compatible = False
+    for segments in unlockers:
+        for dpart, segment in zip(dir_parts, segments):
+            if segment is None:
+                return True  # anything below could match
+            if not segment.match(dpart):
                 break
-        if compatible:
+        else:
+            # Every segment matched, or the pattern named a parent of this
+            # dir → whole subtree eligible.
             return True
     return False
 
@@ -232,25 +443,55 @@ def _dir_could_contain_match(rel_dir_posix: str, include_patterns: list[str]) ->
 # ---------------------------------------------------------------------------
 
 
-def load_gitignore(folders: list[Path]) -> pathspec.PathSpec | None:
-    """Load and combine .gitignore patterns from the given folders."""
-    patterns: list[str] = []
-    for folder in folders:
-        gitignore = folder.resolve() / ".gitignore"
-        if gitignore.is_file():
-            try:
-                patterns.extend(gitignore.read_text(encoding="utf-8").splitlines())
-            except Exception as e:
-                log.warning(f"Could not read {gitignore}: {e}")
-    if not patterns:
+# Compiled .gitignore specs keyed by file path, each stored with the
+# (mtime_ns, size) it was compiled from so an edited file is re-read.
+_gitignore_cache: dict[str, tuple[int, int, pathspec.PathSpec | None]] = {}
+
+
+def load_gitignore(entry: os.DirEntry[str]) -> pathspec.PathSpec | None:
+    """Compile the .gitignore file behind a walker DirEntry (cached)."""
+    try:
+        st = entry.stat()
+    except OSError as e:
+        log.warning(f"Could not read {entry.path}: {e}")
         return None
+    cached = _gitignore_cache.get(entry.path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    spec = None
     try:
-        return pathspec.PathSpec.from_lines(
-            pathspec.patterns.GitWildMatchPattern, patterns
-        )
+        with open(entry.path, "rb") as f:
+            # Like git, don't reject a .gitignore over a stray non-UTF-8 byte.
+            patterns = f.read().decode("utf-8", "replace").splitlines()
     except Exception as e:
-        log.error(f"Error parsing .gitignore patterns: {e}")
-        return None
+        log.warning(f"Could not read {entry.path}: {e}")
+        patterns = []
+    if patterns:
+        try:
+            spec = pathspec.PathSpec.from_lines(
+                pathspec.patterns.GitWildMatchPattern, patterns
+            )
+        except Exception as e:
+            log.error(f"Error parsing {entry.path}: {e}")
+    _gitignore_cache[entry.path] = (st.st_mtime_ns, st.st_size, spec)
+    return spec
+
+
+def _gitignored(
+    rel_posix: str, ignores: tuple[tuple[str, pathspec.PathSpec], ...]
+) -> bool:
+    """Match a base-relative path against the stack of .gitignore specs.
+
+    ignores holds (dir_prefix, spec) pairs from the base folder down to the
+    current directory. As in git, the deepest .gitignore with a matching
+    pattern decides, so a nested file can override (or negate) its parents.
+    """
+    for prefix, spec in reversed(ignores):
+        include = spec.check_file(rel_posix[len(prefix):]).include
+        if include is not None:
+            return include
+    return False
 
 
 # ---------------------------------------------------------------------------
@@ -258,57 +499,65 @@ def load_gitignore(folders: list[Path]) -> pathspec.PathSpec | None:
 # ---------------------------------------------------------------------------
 
 
-def _should_exclude_dir(dir_path: Path, dir_name: str, base: Path, opts: dict) -> bool:
+def _should_exclude_dir(
+    dir_name: str, rel_posix: str, gitignored: bool, opts: dict
+) -> bool:
     """Decide whether a directory should be pruned from the walk.
 
+    rel_posix is the directory's path relative to the scanned base folder,
+    as built up by the walker, so no path resolution is needed here.
+    gitignored is the directory's .gitignore verdict, which the walker
+    computes once and hands down to everything beneath it.
+
     Precedence:
-      1. VCS dirs (.git etc.)            → always pruned
+      1. VCS dirs (.git etc.) and plain
+         --exclude-folders names / globs → always pruned (set lookup,
+                                           one regex on the name)
       2. --exclude-folders / --exclude   → always pruned (excludes win)
       3. hidden dirs (no --include-hidden) and gitignored dirs
          → pruned, UNLESS a path-qualified --include pattern could
            match something inside them.
     """
-    if dir_name in ALWAYS_EXCLUDED_DIRS:
-        return True
-
-    try:
-        rel_posix = str(dir_path.resolve().relative_to(base)).replace(os.sep, "/")
-    except ValueError:
-        rel_posix = dir_name
-    dir_posix = rel_posix + "/"
-
-    # Hard exclusions — never re-entered, even by --include.
-    spec = opts["exclude_dirs_spec"]
-    if spec and spec.match_file(dir_posix):
+    if dir_name in opts["pruned_dir_names"]:
         return True
-    spec = opts["exclude_spec"]
-    if spec and spec.match_file(dir_posix):
+    name_re = opts["pruned_dir_re"]
+    if name_re and name_re.match(dir_name):
         return True
 
-    include_patterns: list[str] = opts["include_patterns"]
+    # Hard exclusions — never re-entered, even by --include.
+    dir_specs = opts["exclude_dir_specs"]
+    if dir_specs:
+        dir_posix = rel_posix + "/"
+        for spec in dir_specs:
+            if spec.match_file(dir_posix):
+                return True
+
+    # Hidden and gitignored directories share one unlock check.
+    if gitignored or (not opts["include_hidden"] and dir_name.startswith(".")):
+        unlockers = opts["dir_unlockers"]
+        return not (unlockers and _dir_could_contain_match(rel_posix, unlockers))
 
-    # Hidden directories
-    if not opts["include_hidden"] and dir_name.startswith("."):
-        if not (
-            include_patterns
-            and _dir_could_contain_match(rel_posix, include_patterns)
-        ):
-            return True
+    return False
 
-    # Gitignored directories
-    spec = opts["gitignore_spec"]
-    if spec and spec.match_file(dir_posix):
-        if not (
-            include_patterns
-            and _dir_could_contain_match(rel_posix, include_patterns)
-        ):
-            return True
 
-    return False
+def make_file_filter(
+    opts: dict,
+) -> Callable[[os.DirEntry[str], str, str, int, tuple], bool]:
+    """Build the centralised per-file include decision for one run.
 
+    Every option is read from opts once, here, and bound as a closure
+    variable, so the returned should_include_file(entry, resolved,
+    rel_posix, dir_verdict, ignores) does no dict lookups per file.
 
-def should_include_file(filepath: Path, rel_path: str, opts: dict) -> bool:
-    """Centralised decision on whether to include a file.
+    entry is the file's DirEntry from the walker; only its name and cached
+    stat() are used, so no Path is built for files that get rejected.
+    resolved is the file path with symlinks resolved, as computed by the
+    caller; rel_posix is its path relative to the scanned base folder.
+    dir_verdict holds the DIR_* bits of the file's directory: below a hidden
+    or gitignored directory (one reached only through an --include pattern)
+    the file is hidden or gitignored too, without looking at its path.
+    ignores is the walker's stack of .gitignore specs in effect for the
+    file's directory.
 
     Pipeline (see --help for the user-facing description):
       1. output file       → never included
@@ -316,73 +565,103 @@ def should_include_file(filepath: Path, rel_path: str, opts: dict) -> bool:
       3. hard excludes     → --exclude patterns, --exclude-extensions
       4. --include match   → included, bypassing hidden/gitignore/extension
                              filters (but still subject to step 3 and size)
-      5. default filters   → hidden, gitignore, extension filter / whitelist
+      5. default filters   → hidden, extension filter / whitelist, gitignore
       6. --max-file-size
     """
-    resolved = filepath.resolve()
+    output_resolved = opts["output_resolved"]
+    direct_files = opts["direct_files"]
+    exclude_spec = opts["exclude_spec"]
+    exclude_extensions = opts["exclude_extensions"]
+    include_names = opts["include_names"]
+    parent_names = opts["include_parent_names"]
+    include_spec = opts["include_spec"]
+    skip_hidden = not opts["include_hidden"]
+    extension_filter_active = opts["extension_filter_active"]
+    extensions = opts["extensions"]
+    include_extensionless = opts["include_extensionless"]
+    include_whitelist = opts["include_whitelist"]
+    max_size = opts["max_file_size"]
+    # Without -e or --exclude-extensions the extension is never looked at.
+    needs_ext = bool(exclude_extensions) or extension_filter_active
+
+    def should_include_file(
+        entry: os.DirEntry[str],
+        resolved: str,
+        rel_posix: str,
+        dir_verdict: int,
+        ignores: tuple[tuple[str, pathspec.PathSpec], ...],
+    ) -> bool:
+        # 1. Never include the output file.
+        if resolved == output_resolved:
+            return False
 
-    # 1. Never include the output file.
-    if opts["output_resolved"] and resolved == opts["output_resolved"]:
-        return False
+        # 2. Directly specified files bypass everything else.
+        if resolved in direct_files:
+            return True
 
-    # 2. Directly specified files bypass everything else.
-    if resolved in opts["direct_files"]:
-        return True
+        ext = _file_extension(entry.name) if needs_ext else ""
 
-    rel_posix = rel_path.replace(os.sep, "/")
-    ext = filepath.suffix[1:].lower() if filepath.suffix else ""
+        # 3. Hard excludes — these always win, including over --include.
+        # The set lookup goes first; it is far cheaper than a pathspec match.
+        if ext and ext in exclude_extensions:
+            return False
+        if exclude_spec and exclude_spec.match_file(rel_posix):
+            return False
 
-    # 3. Hard excludes — these always win, including over --include.
-    spec = opts["exclude_spec"]
-    if spec and spec.match_file(rel_posix):
-        return False
-    if ext and ext in opts["exclude_extensions"]:
-        return False
+        # 4. Explicit includes: plain names by set lookup, the rest via
+        # pathspec.
+        explicitly_included = bool(
+            (
+                parent_names
+                and _matches_name(rel_posix, include_names, parent_names)
+            )
+            or (include_spec and include_spec.match_file(rel_posix))
+        )
 
-    # 4. Explicit includes.
-    include_spec = opts["include_spec"]
-    explicitly_included = bool(include_spec and include_spec.match_file(rel_posix))
+        if not explicitly_included:
+            # 5a. Hidden files / files inside hidden directories.
+            if skip_hidden:
+                if dir_verdict & DIR_HIDDEN or entry.name.startswith("."):
+                    return False
 
-    if not explicitly_included:
-        # 5a. Hidden files / files inside hidden directories.
-        if not opts["include_hidden"]:
-            if any(p.startswith(".") for p in Path(rel_path).parts):
+            # 5b. Extension filter / whitelist semantics. Checked before
+            # gitignore: with -e most files are rejected here by a set
+            # lookup, without walking the .gitignore stack at all.
+            if extension_filter_active:
+                if ext:
+                    if ext not in extensions:
+                        return False
+                else:
+                    if not include_extensionless:
+                        return False
+            elif include_whitelist:
+                # --include given without -e: includes act as a whitelist,
+                # so non-matching files are rejected.
                 return False
+            # Neither --include nor -e: everything passes (default).
 
-        # 5b. Gitignore.
-        spec = opts["gitignore_spec"]
-        if spec and spec.match_file(rel_posix):
-            return False
+            # 5c. Gitignore.
+            if dir_verdict & DIR_IGNORED:
+                return False
+            if ignores and _gitignored(rel_posix, ignores):
+                return False
 
-        # 5c. Extension filter / whitelist semantics.
-        if opts["extension_filter_active"]:
-            if ext:
-                if ext not in opts["extensions"]:
-                    return False
-            else:
-                if not opts["include_extensionless"]:
+        # 6. File size limit.
+        if max_size:
+            try:
+                size = entry.stat().st_size
+                if size > max_size:
+                    log.info(
+                        f"Skipping (>{_format_size(max_size)}): {rel_posix} "
+                        f"({_format_size(size)})"
+                    )
                     return False
-        elif include_spec:
-            # --include given without -e: includes act as a whitelist,
-            # so non-matching files are rejected.
-            return False
-        # Neither --include nor -e: everything passes (default).
+            except OSError:
+                pass
 
-    # 6. File size limit.
-    max_size = opts["max_file_size"]
-    if max_size:
-        try:
-            size = filepath.stat().st_size
-            if size > max_size:
-                log.info(
-                    f"Skipping (>{_format_size(max_size)}): {rel_path} "
-                    f"({_format_size(size)})"
-                )
-                return False
-        except OSError:
-            pass
+        return True
 
-    return True
+    return should_include_file
 
 
 # ---------------------------------------------------------------------------
@@ -390,101 +669,210 @@ def should_include_file(filepath: Path, rel_path: str, opts: dict) -> bool:
 # ---------------------------------------------------------------------------
 
 
-def build_file_list(
-    base_folders: list[Path], opts: dict
-) -> tuple[list[Path], dict[Path, Path]]:
-    """Walk directories and collect files, returning (sorted_files, file→base map)."""
-    found: dict[Path, Path] = {}  # resolved_path → base_folder
+def _scan_files(
+    base_path: str, opts: dict
+) -> Iterator[tuple[os.DirEntry[str], str, int, tuple]]:
+    """Yield (entry, rel_posix, dir_verdict, ignores) for files under base_path.
 
-    for base in base_folders:
-        resolved_base = base.resolve()
+    Built directly on os.scandir so file-type checks come from the cached
+    dirent rather than a stat() per entry. As with os.walk, symlinked
+    directories are never descended into. Only regular files and symlinks
+    to regular files are yielded. The walk is a
+    depth-first loop over an explicit stack, so tree depth is not bounded
+    by the recursion limit and only one directory handle is open at a time.
 
-        for root, dirs, files in os.walk(resolved_base, topdown=True):
-            root_path = Path(root).resolve()
+    A directory's own .gitignore is picked up from its listing and pushed
+    onto ignores for everything beneath it. Gitignore is matched once per
+    directory; once a directory is ignored, everything below it is ignored
+    too (as in git itself), so neither its subdirectories nor its files are
+    matched again.
+    """
+    respect_gitignore = opts["respect_gitignore"]
+    # (dir_path, rel_dir, dir_verdict, ignores)
+    stack: list[tuple[str, str, int, tuple]] = [(base_path, "", 0, ())]
+    while stack:
+        dir_path, rel_dir, dir_verdict, ignores = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError as e:
+            log.debug(f"Cannot scan {dir_path}: {e}")
+            continue
 
-            # Prune excluded directories in-place
-            dirs[:] = [
-                d
-                for d in dirs
-                if not _should_exclude_dir(root_path / d, d, resolved_base, opts)
-            ]
+        if respect_gitignore and not dir_verdict & DIR_IGNORED:
+            for entry in entries:
+                if entry.name == ".gitignore" and entry.is_file():
+                    spec = load_gitignore(entry)
+                    if spec:
+                        prefix = f"{rel_dir}/" if rel_dir else ""
+                        ignores = (*ignores, (prefix, spec))
+                    break
+
+        subdirs: list[tuple[str, str, int, tuple]] = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                verdict = dir_verdict
+                if entry.name.startswith("."):
+                    verdict |= DIR_HIDDEN
+                if not verdict & DIR_IGNORED and ignores and _gitignored(
+                    rel_path + "/", ignores
+                ):
+                    verdict |= DIR_IGNORED
+                if not _should_exclude_dir(
+                    entry.name, rel_path, bool(verdict & DIR_IGNORED), opts
+                ):
+                    subdirs.append((entry.path, rel_path, verdict, ignores))
+            elif entry.is_file():
+                yield entry, rel_path, dir_verdict, ignores
+            # Anything else is a symlinked directory (not followed), a
+            # broken symlink, or a FIFO, socket or device, none of which can
+            # be read as a file (opening a FIFO would block the run).
+
+        # Reversed so subdirectories are popped in listing order.
+        stack.extend(reversed(subdirs))
+
+
+def _walk_base(
+    resolved_base: Path,
+    multi_base: bool,
+    should_include_file: Callable[..., bool],
+    opts: dict,
+) -> dict[str, str]:
+    """Walk one resolved base folder, returning resolved_path → display_path.
 
-            for filename in files:
-                filepath = root_path / filename
-                resolved = filepath.resolve()
-                if resolved in found:
-                    continue
+    should_include_file is the run's filter, as built by make_file_filter.
+    """
+    found: dict[str, str] = {}
+    prefix = _display_prefix(resolved_base) if multi_base else ""
+
+    base_str = str(resolved_base)
+    for entry, rel_path, dir_verdict, ignores in _scan_files(base_str, opts):
+        # The walk starts from a resolved base and never follows
+        # symlinked directories, so only symlinked files need resolving.
+        is_symlink = entry.is_symlink()
+        resolved = os.path.realpath(entry.path) if is_symlink else entry.path
+        if resolved in found:
+            continue
 
-                try:
-                    rel_path = str(filepath.relative_to(resolved_base))
-                except ValueError:
-                    continue
+        if should_include_file(entry, resolved, rel_path, dir_verdict, ignores):
+            if is_symlink:
+                found[resolved] = prefix + _relative_path(resolved, base_str)
+            elif os.sep == "/":
+                found[resolved] = prefix + rel_path
+            else:
+                found[resolved] = prefix + rel_path.replace("/", os.sep)
+    return found
+
+
+def build_file_list(
+    base_folders: list[Path], opts: dict
+) -> tuple[list[str], dict[str, str]]:
+    """Walk directories and collect files, returning (sorted_files, file→display path).
+
+    base_folders must already be resolved (main() resolves them once).
+    Display paths are relative to the file's base folder, prefixed with the
+    folder name when several folders are scanned. They are taken from the
+    relative path the walker already built, so no second pass over the
+    file list is needed; only symlinks (whose target may live elsewhere)
+    are displayed relative to their resolved location. Display paths are
+    plain strings with native separators, built once here, so later steps
+    never construct or stringify Path objects per file.
+
+    Files are keyed by their resolved path as a plain string, which is all
+    the deduplication across overlapping folders and symlinks needs.
+    Several base folders are walked concurrently on a small thread pool.
+    """
+    multi_base = len(base_folders) > 1
+    found: dict[str, str] = {}  # resolved_path → display_path
+    should_include_file = make_file_filter(opts)
 
-                if should_include_file(filepath, rel_path, opts):
-                    found[resolved] = resolved_base
+    def walk(base: Path) -> dict[str, str]:
+        return _walk_base(base, multi_base, should_include_file, opts)
 
-    # Direct files are always added (output-file guard is inside should_include_file)
-    for f in opts["direct_file_paths"]:
-        resolved = f.resolve()
+    if multi_base:
+        # Walks are I/O-bound, so separate bases can be scanned concurrently.
+        # Results are merged in base order so the first base still wins.
+        with ThreadPoolExecutor(max_workers=min(8, len(base_folders))) as pool:
+            walks = list(pool.map(walk, base_folders))
+    else:
+        walks = [walk(base) for base in base_folders]
+
+    for walked in walks:
+        for resolved, display in walked.items():
+            found.setdefault(resolved, display)
+
+    # Direct files are always added, except the output file itself
+    cwd = Path.cwd().resolve()
+    prefix = _display_prefix(cwd) if multi_base else ""
+    for resolved in opts["direct_file_list"]:
         if resolved not in found and resolved != opts["output_resolved"]:
-            # Use CWD as the base so the display path is the user-supplied path
-            found[resolved] = Path.cwd()
+            # Relative to CWD so the display path is the user-supplied path
+            found[resolved] = prefix + _relative_path(resolved, str(cwd))
 
-    return sorted(found), found
+    files = sorted(found, key=_path_sort_key)
+    return files, found
 
 
 # ---------------------------------------------------------------------------
-# Display paths & tree
+# Tree
 # ---------------------------------------------------------------------------
 
 
-def _compute_display_paths(
-    files: list[Path],
-    file_to_base: dict[Path, Path],
-    multi_base: bool,
-) -> dict[Path, Path]:
-    """Map resolved file paths to human-readable display paths."""
-    result: dict[Path, Path] = {}
-    for f in files:
-        base = file_to_base[f]
-        rel = _relative_path(f, base)
-        if multi_base:
-            rel = Path(base.name) / rel
-        result[f] = rel
-    return result
-
-
-def format_tree(display_paths: list[Path], root_label: str) -> str:
-    """Build an ASCII tree from a sorted list of relative display paths."""
+def format_tree(display_paths: list[str], root_label: str) -> str:
+    """Build an ASCII tree from relative display paths, given in any order."""
     tree: dict = {}
-    for dp in sorted(display_paths):
+    for dp in display_paths:
         node = tree
-        parts = dp.parts
-        for part in parts[:-1]:
-            if part not in node or node[part] is None:
-                node[part] = {}
-            node = node[part]
-        node[parts[-1]] = None  # leaf
+        # Display paths are always relative and normalised.
+        *dirs, leaf = dp.split(os.sep)
+        for part in dirs:
+            child = node.get(part)
+            if child is None:
+                child = node[part] = {}
+            node = child
+        node.setdefault(leaf, None)  # leaf; never replaces a directory
 
     lines = [f"{root_label}/"]
-    lines.extend(_render_tree(tree, prefix=""))
+    _render_tree(tree, "", lines)
     return "\n".join(lines)
 
 
-def _render_tree(tree: dict, prefix: str) -> list[str]:
-    """Recursively render tree dict as lines with box-drawing connectors."""
-    lines: list[str] = []
-    entries = sorted(tree.items(), key=lambda x: (x[1] is None, x[0].lower()))
-    for i, (name, subtree) in enumerate(entries):
-        is_last = i == len(entries) - 1
+def _sorted_children(tree: dict) -> list[tuple[str, dict | None]]:
+    """Directory entries in reverse display order (dirs first, then by name).
+
+    Names that differ only in case are ordered by the raw name, so the
+    order never depends on the filesystem's listing order.
+    """
+    return sorted(
+        tree.items(),
+        key=lambda x: (x[1] is None, x[0].lower(), x[0]),
+        reverse=True,
+    )
+
+
+def _render_tree(tree: dict, prefix: str, lines: list[str]) -> None:
+    """Render tree dict into lines, with box-drawing connectors.
+
+    Appends to a single shared list and walks with an explicit stack, so
+    deep trees neither re-copy their lines nor hit the recursion limit.
+    """
+    stack = [(_sorted_children(tree), prefix)]
+    while stack:
+        entries, prefix = stack[-1]
+        if not entries:
+            stack.pop()
+            continue
+        name, subtree = entries.pop()
+        is_last = not entries
         connector = "└── " if is_last else "├── "
-        extension = "    " if is_last else "│   "
         if subtree is not None:
             lines.append(f"{prefix}{connector}{name}/")
-            lines.extend(_render_tree(subtree, prefix + extension))
+            stack.append(
+                (_sorted_children(subtree), prefix + ("    " if is_last else "│   "))
+            )
         else:
             lines.append(f"{prefix}{connector}{name}")
-    return lines
 
 
 # ---------------------------------------------------------------------------
@@ -492,27 +880,166 @@ def _render_tree(tree: dict, prefix: str) -> list[str]:
 # ---------------------------------------------------------------------------
 
 
-def process_file(filepath: Path, display_path: Path) -> tuple[Path, str] | None:
-    """Read a single file, returning (display_path, formatted_markdown) or None."""
+def _open_input(filepath: str) -> int:
+    """Open a file for reading, with O_NOATIME where the kernel allows it."""
+    if NOATIME_FLAG:
+        try:
+            return os.open(filepath, READ_FLAGS | NOATIME_FLAG)
+        except PermissionError:
+            pass  # not our file: open it normally
+    return os.open(filepath, READ_FLAGS)
+
+
+def _looks_binary(data, end: int) -> bool:
+    """Does data[:end] (bytes or mmap) look like a binary file?"""
+    end = min(end, BINARY_SNIFF_SIZE)
+    return (
+        data[:min(end, 8)].startswith(BINARY_SIGNATURES)
+        or data.find(b"\0", 0, end) != -1
+    )
+
+
+def _read_text(filepath: str) -> str | bytes | None:
+    """Read a whole file as UTF-8 text, with as few syscalls as possible.
+
+    A single os.read() sized from fstat() covers practically every source
+    file (open, fstat, read, close); asking for one byte more than the
+    size lets that read also detect EOF. Only files that change size
+    mid-read fall back to reading in chunks. Files of MMAP_THRESHOLD or
+    more are memory-mapped and decoded straight from the mapping, which
+    saves copying them into an intermediate bytes object first.
+
+    Pure-ASCII content read with os.read(), which is most source code, is
+    already valid UTF-8 and is returned as the raw bytes, with no decode;
+    anything else is decoded to str. Returns None for binary content (see
+    _looks_binary), which for a large file means only its first pages are
+    ever touched. Raises UnicodeDecodeError for other content that isn't
+    valid UTF-8.
+    """
+    fd = _open_input(filepath)
+    try:
+        size = os.fstat(fd).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                if _looks_binary(mm, size):
+                    return None
+                return str(mm, "utf-8")
+        data = os.read(fd, size + 1)
+        if len(data) != size:
+            parts = [data]
+            while chunk := os.read(fd, 1 << 20):
+                parts.append(chunk)
+            data = b"".join(parts)
+    finally:
+        os.close(fd)
+    if _looks_binary(data, len(data)):
+        return None
+    return data if data.isascii() else data.decode("utf-8")
+
+
+def process_file(filepath: str, display_path: str) -> tuple[str, bytes] | None:
+    """Read a single file, returning (display_path, utf-8 markdown) or None.
+
+    The markdown is encoded here, in the worker thread, so the single
+    writer in main() only has to copy bytes into the output file. Small
+    pure-ASCII files never go through str at all: their bytes are framed as
+    they are.
+    """
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
+        content = _read_text(filepath)
     except UnicodeDecodeError:
-        log.info(f"Binary file: {display_path}")
-        return (
-            display_path,
-            f"## `{display_path}`\n\n*Binary file — content not shown.*\n\n",
-        )
+        content = None
     except Exception as e:
         log.error(f"Error reading {display_path}: {e}")
         return None
 
-    lang = _detect_language(filepath, content)
+    if content is None:
+        log.info(f"Binary file: {display_path}")
+        md = f"## `{display_path}`\n\n*Binary file — content not shown.*\n\n"
+        return display_path, md.encode("utf-8")
+
+    if isinstance(content, bytes):
+        if b"\r" in content:
+            content = content.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        lang = _detect_language(os.path.basename(filepath), content)
+        head = f"## `{display_path}`\n\n~~~{lang}\n".encode("utf-8")
+        body = content.strip(ASCII_WHITESPACE)
+        return display_path, b"".join((head, body, b"\n~~~\n\n"))
+
+    if "\r" in content:
+        # Universal newlines, as text-mode open() would have applied.
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+
+    lang = _detect_language(os.path.basename(filepath), content)
     body = content.strip()
-    return (
-        display_path,
-        f"## `{display_path}`\n\n~~~{lang}\n{body}\n~~~\n\n",
-    )
+    md = f"## `{display_path}`\n\n~~~{lang}\n{body}\n~~~\n\n"
+    return display_path, md.encode("utf-8")
+
+
+def process_chunk(
+    chunk: list[tuple[str, str]],
+) -> list[tuple[str, bytes] | None]:
+    """Run process_file over a batch of (filepath, display_path) pairs.
+
+    Submitting files to the pool in batches keeps executor and progress
+    bookkeeping per batch rather than per file.
+    """
+    results: list[tuple[str, bytes] | None] = []
+    for filepath, display_path in chunk:
+        try:
+            results.append(process_file(filepath, display_path))
+        except Exception as e:
+            log.error(f"Error processing {filepath}: {e}")
+            results.append(None)
+    return results
+
+
+def _write_blobs(out, blobs: list[bytes]) -> None:
+    """Write blobs to a binary file object, gathering them with os.writev.
+
+    The file's buffer is flushed first so the gathered writes land after
+    anything already written through it. Without os.writev (Windows) the
+    blobs simply go through the buffered writer.
+    """
+    if not hasattr(os, "writev"):
+        out.writelines(blobs)
+        return
+    out.flush()
+    fd = out.fileno()
+    for i in range(0, len(blobs), WRITEV_BATCH):
+        batch = blobs[i:i + WRITEV_BATCH]
+        written = os.writev(fd, batch)
+        # A partial write leaves a tail to finish with plain writes.
+        for blob in batch:
+            if written >= len(blob):
+                written -= len(blob)
+                continue
+            view = memoryview(blob)[written:]
+            while view:
+                view = view[os.write(fd, view):]
+            written = 0
+
+
+def _format_header(
+    output_path: Path,
+    base_folders: list[Path],
+    direct_file_paths: list[Path],
+    display_paths: list[str],
+    root_label: str,
+) -> bytes:
+    """Render the output's title, scanned-folder lines and structure tree."""
+    header = [
+        f"# Codebase: {output_path.stem}\n\n",
+        f"Scanned: `{'`, `'.join(str(b) for b in base_folders)}`\n\n",
+    ]
+    if direct_file_paths:
+        header.append(
+            f"Direct files: `{'`, `'.join(str(p) for p in direct_file_paths)}`\n\n"
+        )
+    header.append("## Structure\n\n~~~\n")
+    header.append(format_tree(display_paths, root_label))
+    header.append("\n~~~\n\n---\n\n")
+    return "".join(header).encode("utf-8")
 
 
 # ---------------------------------------------------------------------------
@@ -521,13 +1048,25 @@ def process_file(filepath: Path, display_path: Path) -> tuple[Path, str] | None:
 
 
 def _dir_path(value: str) -> Path:
-    """Argparse type: verify directory exists."""
-    p = Path(value)
-    if not p.exists():
+    """Argparse type: verify directory exists (one stat() call)."""
+    try:
+        st = os.stat(value)
+    except (OSError, ValueError):
         raise argparse.ArgumentTypeError(f"'{value}' does not exist.")
-    if not p.is_dir():
+    if not stat.S_ISDIR(st.st_mode):
         raise argparse.ArgumentTypeError(f"'{value}' is not a directory.")
-    return p
+    return Path(value)
+
+
+def _positive_int(value: str) -> int:
+    """Argparse type: integer >= 1."""
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not an integer.")
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' must be at least 1.")
+    return n
 
 
 EPILOG = """\
@@ -546,6 +1085,7 @@ in order. Earlier stages always win over later ones:
   4. Default filters (only for files NOT matched by --include):
        - hidden files/directories are skipped unless --include-hidden
        - files matching .gitignore are skipped unless --no-gitignore
+         (.gitignore files in subdirectories apply below them, as in git)
        - if -e/--extensions is given, only those extensions pass
          (extensionless files like Makefile additionally need
          --include-extensionless)
@@ -750,6 +1290,15 @@ def main() -> None:
             "Does not apply to --files."
         ),
     )
+    beh_group.add_argument(
+        "--io-concurrency",
+        type=_positive_int, default=DEFAULT_IO_CONCURRENCY, metavar="N",
+        help=(
+            "Number of files to read in parallel (default: %(default)s). "
+            "Use a low value such as 1 or 2 on spinning disks, where "
+            "concurrent reads mostly cause extra seeking."
+        ),
+    )
     beh_group.add_argument(
         "--dry-run", action="store_true",
         help="List the files that would be included (with sizes and a tree), "
@@ -769,49 +1318,82 @@ def main() -> None:
         base_folders = [Path(".")]
 
     # ---- Validate & resolve direct files ----
-    direct_files: set[Path] = set()
+    direct_files: list[str] = []  # resolved, in command-line order
     direct_file_paths: list[Path] = []
     for f in args.files:
         if f.is_file():
-            direct_files.add(f.resolve())
+            direct_files.append(str(f.resolve()))
             direct_file_paths.append(f)
         else:
             console.print(f"[yellow]Warning: file not found: {f}[/]")
 
     output_path = Path(args.output)
-    output_resolved = output_path.resolve()
+    output_resolved = str(output_path.resolve())
 
     # ---- Compile pattern specs (gitignore-style, via pathspec) ----
-    include_spec = _compile_spec(args.include, "--include", parser)
+    args.include = _dedupe_patterns(args.include)
+    args.exclude = _dedupe_patterns(args.exclude)
+    args.exclude_folders = _dedupe_patterns(args.exclude_folders)
+    # Plain --include names ('Makefile', 'docs/') are matched by set lookup
+    # against the path components; only real patterns go through pathspec.
+    include_names, include_patterns = _split_name_patterns(
+        [p for p in args.include if not p.endswith("/")]
+    )
+    include_dir_names, include_dir_patterns = _split_name_patterns(
+        [p for p in args.include if p.endswith("/")]
+    )
+    if any(p.strip().startswith("!") for p in args.include):
+        # Negations make order significant: keep everything as one spec.
+        include_names = include_dir_names = frozenset()
+        include_patterns, include_dir_patterns = args.include, []
+    include_spec = _compile_spec(
+        include_patterns + include_dir_patterns, "--include", parser
+    )
     exclude_spec = _compile_spec(args.exclude, "--exclude", parser)
-    exclude_dirs_spec = _compile_spec(args.exclude_folders, "--exclude-folders", parser)
+    # Plain names ('node_modules', 'dist/') are pruned by a set lookup on the
+    # directory name; only real patterns go through pathspec.
+    exclude_dir_names, exclude_dir_patterns = _split_name_patterns(args.exclude_folders)
+    # Likewise slash-free globs ('build-*') become one regex on the name.
+    exclude_dir_re, exclude_dir_patterns = _compile_name_globs(exclude_dir_patterns)
+    exclude_dirs_spec = _compile_spec(
+        exclude_dir_patterns, "--exclude-folders", parser
+    )
+    # A directory is pruned if either spec matches it. Without negations
+    # that is the same as one spec holding both pattern lists.
+    exclude_dir_specs = tuple(s for s in (exclude_dirs_spec, exclude_spec) if s)
+    if len(exclude_dir_specs) == 2 and not any(
+        p.strip().startswith("!") for p in exclude_dir_patterns + args.exclude
+    ):
+        exclude_dir_specs = (exclude_dirs_spec + exclude_spec,)
 
     # ---- Extension filtering ----
-    extensions: set[str] = {e.lower().lstrip(".") for e in args.extensions}
-    exclude_extensions: set[str] = {
+    extensions: frozenset[str] = frozenset(
+        e.lower().lstrip(".") for e in args.extensions
+    )
+    exclude_extensions: frozenset[str] = frozenset(
         e.lower().lstrip(".") for e in args.exclude_extensions
-    }
+    )
     extension_filter_active = bool(extensions)
 
-    # ---- Gitignore ----
-    gitignore_spec = None
-    if not args.no_gitignore:
-        gitignore_spec = load_gitignore(base_folders)
-
     # ---- Max file size ----
     max_file_size = args.max_file_size * 1024 if args.max_file_size > 0 else None
 
     # ---- Build options dict ----
     opts: dict = {
         "output_resolved": output_resolved,
-        "direct_files": direct_files,
-        "direct_file_paths": direct_file_paths,
+        "direct_files": frozenset(direct_files),
+        "direct_file_list": direct_files,
         "include_hidden": args.include_hidden,
         "include_spec": include_spec,
-        "include_patterns": args.include,
+        "include_names": include_names,
+        "include_parent_names": include_names | include_dir_names,
+        "include_whitelist": bool(args.include),
+        "dir_unlockers": _compile_dir_unlockers(args.include),
         "exclude_spec": exclude_spec,
-        "exclude_dirs_spec": exclude_dirs_spec,
-        "gitignore_spec": gitignore_spec,
+        "exclude_dir_specs": exclude_dir_specs,
+        "pruned_dir_names": exclude_dir_names | ALWAYS_EXCLUDED_DIRS,
+        "pruned_dir_re": exclude_dir_re,
+        "respect_gitignore": not args.no_gitignore,
         "extension_filter_active": extension_filter_active,
         "extensions": extensions,
         "exclude_extensions": exclude_extensions,
@@ -829,9 +1411,9 @@ def main() -> None:
         )
     console.print(f"  Output: [green]{output_path}[/]")
 
-    if include_spec and extension_filter_active:
+    if args.include and extension_filter_active:
         mode = "union of --include patterns and -e extensions"
-    elif include_spec:
+    elif args.include:
         mode = "--include whitelist"
     elif extension_filter_active:
         mode = "extension filter"
@@ -856,12 +1438,7 @@ def main() -> None:
         console.print(
             f"  Excluding ext: [yellow]{', '.join(sorted(exclude_extensions))}[/]"
         )
-    if args.no_gitignore:
-        gitignore_status = "disabled"
-    elif gitignore_spec:
-        gitignore_status = "respected"
-    else:
-        gitignore_status = "respected (no patterns found)"
+    gitignore_status = "disabled" if args.no_gitignore else "respected"
     console.print(f"  Gitignore: [cyan]{gitignore_status}[/]")
     console.print(
         f"  Hidden files: [cyan]{'yes' if args.include_hidden else 'no'}[/]"
@@ -871,18 +1448,16 @@ def main() -> None:
     console.print()
 
     # ---- Build file list ----
-    files_to_process, file_to_base = build_file_list(base_folders, opts)
+    resolved_bases = [b.resolve() for b in base_folders]
+    files_to_process, display_paths = build_file_list(resolved_bases, opts)
 
     if not files_to_process:
         log.warning("No files matched. Nothing to do.")
         return
 
-    multi_base = len(base_folders) > 1
-    display_paths = _compute_display_paths(files_to_process, file_to_base, multi_base)
-
-    if len(base_folders) == 1:
-        root_label = base_folders[0].resolve().name
-    elif base_folders:
+    if len(resolved_bases) == 1:
+        root_label = resolved_bases[0].name
+    elif resolved_bases:
         root_label = "<multi>"
     else:
         root_label = "."
@@ -892,7 +1467,7 @@ def main() -> None:
         total_size = 0
         for f in files_to_process:
             try:
-                total_size += f.stat().st_size
+                total_size += os.stat(f).st_size
             except OSError:
                 pass
         console.print(
@@ -902,7 +1477,7 @@ def main() -> None:
         for f in files_to_process:
             dp = display_paths[f]
             try:
-                sz = _format_size(f.stat().st_size)
+                sz = _format_size(os.stat(f).st_size)
             except OSError:
                 sz = "?"
             console.print(f"  {dp}  [dim]({sz})[/]")
@@ -911,69 +1486,110 @@ def main() -> None:
         console.print(format_tree(list(display_paths.values()), root_label))
         return
 
-    # ---- Write header & tree ----
+    # ---- Open the output once; everything goes through one buffered writer ----
     try:
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(f"# Codebase: {output_path.stem}\n\n")
-            f.write(
-                f"Scanned: `{'`, `'.join(str(b) for b in base_folders)}`\n\n"
-            )
-            if direct_file_paths:
-                f.write(
-                    f"Direct files: `{'`, `'.join(str(p) for p in direct_file_paths)}`\n\n"
-                )
-            f.write("## Structure\n\n~~~\n")
-            f.write(format_tree(list(display_paths.values()), root_label))
-            f.write("\n~~~\n\n---\n\n")
+        out = open(output_path, "wb", buffering=OUTPUT_BUFFER_SIZE)
     except Exception as e:
-        log.error(f"Failed writing header/tree: {e}")
+        log.error(f"Failed opening output file: {e}")
         return
 
-    # ---- Process files concurrently ----
-    results: dict[Path, str] = {}  # display_path → formatted content
-    skipped = 0
-
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-        TimeElapsedColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Reading files", total=len(files_to_process))
-
-        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
-            futures = {
-                pool.submit(process_file, fp, display_paths[fp]): fp
-                for fp in files_to_process
-            }
-            for future in as_completed(futures):
+    with out:
+        # ---- Process files concurrently, writing in display-path order ----
+        written = 0
+        skipped = 0
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            TimeElapsedColumn(),
+            console=console,
+            # Progress is advanced once per chunk; a slow refresh is plenty,
+            # and there is nothing to animate when output isn't a terminal.
+            refresh_per_second=4,
+            disable=not console.is_terminal,
+        ) as progress:
+            task = progress.add_task("Reading files", total=len(files_to_process))
+
+            # Batch files into chunks of up to MAX_CHUNK_SIZE, but keep
+            # several chunks per worker so small runs still spread out.
+            work = sorted(
+                ((fp, display_paths[fp]) for fp in files_to_process),
+                key=lambda item: _path_sort_key(item[1]),
+            )
+            chunk_size = max(
+                1, min(MAX_CHUNK_SIZE, len(work) // (args.io_concurrency * 4))
+            )
+            chunks = (
+                work[i:i + chunk_size] for i in range(0, len(work), chunk_size)
+            )
+            # Chunks are submitted in output order and written as soon as
+            # the oldest one is done. At most `window` chunks are in flight,
+            # which bounds memory to that many chunks' worth of content.
+            window = args.io_concurrency * 2
+            pending: deque[Future[list[tuple[str, bytes] | None]]] = deque()
+
+            def write_oldest() -> None:
+                # Waits for the oldest chunk, then also takes any later ones
+                # that are already done, so they share one gathered write.
+                nonlocal written, skipped
+                blobs: list[bytes] = []
+                done = 0
+                while True:
+                    chunk_results = pending.popleft().result()
+                    blobs.extend(result[1] for result in chunk_results if result)
+                    done += len(chunk_results)
+                    if not (pending and pending[0].done()):
+                        break
+                _write_blobs(out, blobs)
+                written += len(blobs)
+                skipped += done - len(blobs)
+                # One progress update per write, however many chunks it took.
+                progress.update(task, advance=done)
+
+            with ThreadPoolExecutor(max_workers=args.io_concurrency) as pool:
+
+                def fill_window() -> None:
+                    # A write can take several finished chunks at once, so
+                    # top the window back up rather than submitting one.
+                    for chunk in islice(chunks, window - len(pending)):
+                        pending.append(pool.submit(process_chunk, chunk))
+
+                fill_window()
+
+                # ---- Write header & tree ----
+                # Formatted while the first window of reads is in flight.
                 try:
-                    result = future.result()
-                    if result:
-                        dp, content = result
-                        results[dp] = content
-                    else:
-                        skipped += 1
+                    out.write(
+                        _format_header(
+                            output_path,
+                            base_folders,
+                            direct_file_paths,
+                            list(display_paths.values()),
+                            root_label,
+                        )
+                    )
                 except Exception as e:
-                    log.error(f"Error processing {futures[future]}: {e}")
-                    skipped += 1
-                finally:
-                    progress.update(task, advance=1)
+                    log.error(f"Failed writing header/tree: {e}")
+                    for future in pending:
+                        future.cancel()
+                    return
 
-    # ---- Append content in sorted order ----
-    try:
-        with open(output_path, "a", encoding="utf-8") as f:
-            for dp in sorted(results):
-                f.write(results[dp])
-    except Exception as e:
-        log.error(f"Failed writing file contents: {e}")
-        return
+                try:
+                    while pending:
+                        write_oldest()
+                        fill_window()
+                    out.flush()
+                except Exception as e:
+                    log.error(f"Failed writing file contents: {e}")
+                    for future in pending:
+                        future.cancel()
+                    return
 
     console.print(
-        f"\n[bold green]✓[/] {len(results)} files written to "
+        f"\n[bold green]✓[/] {written} files written to "
         f"[blue]{output_path}[/]. {skipped} skipped."
     )
 
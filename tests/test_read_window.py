@@ -0,0 +1,72 @@
+"""Tests for the bounded window of chunk reads in main()."""
+
+import sys
+from concurrent.futures import Future
+
+from projdmp import __main__ as projdmp
+
+
+def test_read_window_is_refilled_after_each_write(tmp_path, monkeypatch):
+    """Every write tops the window back up to its full size.
+
+    A write takes all the chunks that have already finished. Submitting a
+    single replacement afterwards would leave one chunk in flight for the
+    rest of the run, whatever --io-concurrency says.
+    """
+    src = tmp_path / "src"
+    src.mkdir()
+    n_files = 1024
+    for i in range(n_files):
+        (src / f"f{i:04}.py").write_text(f"x = {i}\n")
+
+    submitted = 0
+    consumed = 0
+    in_flight: list[int] = []  # chunks in flight after each submission
+
+    class CountingFuture(Future):
+        def result(self, timeout=None):
+            nonlocal consumed
+            consumed += 1
+            return super().result(timeout)
+
+    class InlinePool:
+        """Runs each chunk on submit, so every future is already done."""
+
+        def __init__(self, max_workers=None):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def submit(self, fn, *args):
+            nonlocal submitted
+            future = CountingFuture()
+            future.set_result(fn(*args))
+            submitted += 1
+            in_flight.append(submitted - consumed)
+            return future
+
+    io_concurrency = 2
+    monkeypatch.setattr(projdmp, "ThreadPoolExecutor", InlinePool)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "projdmp",
+            "-f", str(src),
+            "-o", str(tmp_path / "out.md"),
+            "--io-concurrency", str(io_concurrency),
+        ],
+    )
+    projdmp.main()
+
+    window = io_concurrency * 2
+    assert submitted == consumed
+    assert submitted > 2 * window  # enough chunks to get past the first window
+    # Past the first window, writes are followed by a full refill, not a
+    # single replacement chunk.
+    assert max(in_flight[window:]) == window
+    assert (tmp_path / "out.md").read_text().count("\n## `") == n_files